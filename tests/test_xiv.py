@@ -1,45 +1,89 @@
 # -*- coding: utf-8 -*-
 """Test suite for xiv - minimal, elegant, comprehensive"""
-import pytest, sys, os, json, tempfile, shutil, time
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
+import pytest, sys, os, io, json, time, signal
+from datetime import datetime
 
 # Fixtures and helpers
-class MockResponse:
-    def __init__(self, content):
-        self.content = content if isinstance(content, bytes) else content.encode('utf-8')
-    def read(self): return self.content
-    def close(self): pass
-
-@pytest.fixture
+class MockResponse(io.BytesIO):
+    """File-like HTTP response; read(n)/readinto come from BytesIO"""
+    def __init__(self, content, headers=None, code=200):
+        io.BytesIO.__init__(self, content if isinstance(content, bytes) else content.encode('utf-8'))
+        self.headers = headers or {}
+        self.code = code
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.code
+
+class DroppedResponse(MockResponse):
+    """Response whose connection drops after the first read"""
+    def read(self, size=-1):
+        if self.tell():
+            raise Exception("Connection timeout")
+        return MockResponse.read(self, size)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'tests', 'fixtures')
+_FIXTURE_CACHE = {}
+
+def load_fixture(fname):
+    """Read fixture file bytes once per session"""
+    if fname not in _FIXTURE_CACHE:
+        with open(os.path.join(FIXTURES_DIR, fname), 'rb') as f:
+            _FIXTURE_CACHE[fname] = f.read()
+    return _FIXTURE_CACHE[fname]
+
+def fixture_response(fname):
+    """Fresh MockResponse over cached fixture bytes; responses are read incrementally"""
+    return MockResponse(load_fixture(fname))
+
+@pytest.fixture(scope='session')
 def xiv():
     import xiv
     return xiv
 
 @pytest.fixture
-def tmpdir():
-    d = tempfile.mkdtemp()
-    yield d
-    shutil.rmtree(d)
+def configure_xiv(xiv, monkeypatch):
+    """Apply load_config() under the patched environment; monkeypatch restores the globals"""
+    def configure():
+        for name, value in xiv.load_config().items():
+            monkeypatch.setattr(xiv, name, value)
+        return xiv
+    return configure
+
+@pytest.fixture(autouse=True)
+def no_query_cache(xiv, monkeypatch):
+    """Ignore the developer's XIV_CACHE_TTL so tests never read or write a real cache"""
+    monkeypatch.setattr(xiv, 'DEFAULT_CACHE_TTL', 0)
 
 @pytest.fixture
-def mock_xiv_urlopen(xiv, monkeypatch, fixtures_dir):
-    """Mock xiv.urlopen to return fixtures"""
-    def urlopen(url):
-        url_str = url.get_full_url() if hasattr(url, 'get_full_url') else str(url)
-
-        if 'export.arxiv.org/api/query' in url_str:
-            fname = 'arxiv_empty.xml' if any(x in url_str for x in ['nonexistent', 'xyzabc']) else 'arxiv_response.xml'
-        elif 'arxiv.org/pdf/' in url_str:
-            fname = 'captcha.html' if 'captcha' in url_str else 'test.pdf'
-        else:
-            return None
-
-        with open(os.path.join(fixtures_dir, fname), 'rb') as f:
-            return MockResponse(f.read())
-
-    monkeypatch.setattr(xiv, 'urlopen', urlopen)
-    return urlopen
+def tmpdir(tmp_path):
+    """Per-test directory as str, cleaned up by pytest's tmp_path retention"""
+    return str(tmp_path)
+
+EMPTY_QUERY_MARKERS = ('nonexistent', 'xyzabc')  # queries answered with the empty feed
+
+def mock_urlopen(url):
+    """Route arXiv API and PDF requests to fixture responses"""
+    url_str = url.get_full_url() if hasattr(url, 'get_full_url') else str(url)
+
+    if '/api/query' in url_str:
+        empty = any(m in url_str for m in EMPTY_QUERY_MARKERS)
+        return fixture_response('arxiv_empty.xml' if empty else 'arxiv_response.xml')
+    if '/pdf/' in url_str:
+        return fixture_response('captcha.html' if 'captcha' in url_str else 'test.pdf')
+    return None
+
+@pytest.fixture(scope='class')
+def mock_xiv_urlopen():
+    """Patch xiv.urlopen with fixture responses once per test class"""
+    import xiv
+    original = xiv.urlopen
+    xiv.urlopen = mock_urlopen
+    yield mock_urlopen
+    xiv.urlopen = original
 
 
 # Search function tests
@@ -57,6 +101,18 @@ class TestSearch:
         papers = xiv.search('test', max_results=1, categories=categories)
         assert isinstance(papers, list)
 
+    @pytest.mark.parametrize('categories,expected', [
+        (None, 'search_query=%28cat%3Acs.AI+OR+cat%3Acs.CV%29+AND+%28test%29'),
+        (['cs.LG'], 'search_query=%28cat%3Acs.LG%29+AND+%28test%29'),
+    ])
+    def test_builds_category_query(self, xiv, monkeypatch, categories, expected):
+        """Space-separated XIV_CATEGORY values are OR-ed like -c categories"""
+        urls = []
+        monkeypatch.setattr(xiv, 'DEFAULT_CATEGORY', 'cs.AI cs.CV')
+        monkeypatch.setattr(xiv, 'urlopen', lambda req: urls.append(req.get_full_url()) or mock_urlopen(req))
+        xiv.search('test', max_results=1, categories=categories)
+        assert expected in urls[0]
+
     def test_accepts_sort_parameter(self, xiv):
         papers = xiv.search('test', max_results=1, sort='relevance')
         assert isinstance(papers, list)
@@ -65,6 +121,10 @@ class TestSearch:
         papers = xiv.search('test', max_results=10, since='2025-10-17')
         assert papers == []  # Fixture papers are from 2025-10-16
 
+    def test_keeps_papers_published_on_since_date(self, xiv):
+        papers = xiv.search('test', max_results=10, since='2025-10-16')
+        assert papers and all(p['published'] == '2025-10-16' for p in papers)
+
     def test_published_date_format(self, xiv):
         papers = xiv.search('test', max_results=1)
         date = papers[0]['published']
@@ -86,6 +146,15 @@ class TestSearch:
         papers = xiv.search('test', max_results=10, since='2026-01-01')
         assert papers == []
 
+    def test_requests_and_decodes_gzip(self, xiv, monkeypatch):
+        import zlib
+        gz = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        body = gz.compress(load_fixture('arxiv_response.xml')) + gz.flush()
+        requests = []
+        monkeypatch.setattr(xiv, 'urlopen', lambda req: requests.append(req) or MockResponse(body))
+        assert len(xiv.search('neural', max_results=2)) == 2
+        assert requests[0].get_header('Accept-encoding') == 'gzip'
+
     def test_returns_empty_list_when_retry_fails(self, xiv, monkeypatch):
         """Test search() returns [] when API is completely unavailable"""
         monkeypatch.setattr(xiv, 'retry_with_backoff', lambda op, msg: None)
@@ -93,21 +162,140 @@ class TestSearch:
         assert result == []
 
 
+class TestQueryCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, xiv, monkeypatch, tmpdir):
+        self.xiv = xiv
+        self.calls = []
+        monkeypatch.setattr(xiv, 'DEFAULT_CACHE_DIR', os.path.join(tmpdir, 'cache'))
+        monkeypatch.setattr(xiv, 'DEFAULT_CACHE_TTL', 3600)
+        monkeypatch.setattr(xiv, 'urlopen', lambda req: self.calls.append(req) or mock_urlopen(req.get_full_url()))
+
+    def test_repeat_search_served_from_cache(self):
+        first = self.xiv.search('neural', max_results=2)
+        assert self.xiv.search('neural', max_results=2) == first
+        assert len(self.calls) == 1
+
+    def test_different_query_misses_cache(self):
+        self.xiv.search('neural', max_results=2)
+        self.xiv.search('neural', max_results=3)
+        assert len(self.calls) == 2
+
+    def test_expired_entry_refetched(self):
+        self.xiv.search('neural', max_results=2)
+        for name in os.listdir(self.xiv.DEFAULT_CACHE_DIR):
+            path = os.path.join(self.xiv.DEFAULT_CACHE_DIR, name)
+            os.utime(path, (time.time() - 7200, time.time() - 7200))
+        self.xiv.search('neural', max_results=2)
+        assert len(self.calls) == 2
+
+    def test_expired_entry_revalidated_with_304(self, monkeypatch):
+        validators = {'Last-Modified': 'Tue, 14 Oct 2025 18:00:00 GMT', 'ETag': '"abc123"'}
+
+        def with_validators(req):
+            self.calls.append(req)
+            resp = mock_urlopen(req.get_full_url())
+            resp.headers = validators
+            return resp
+        monkeypatch.setattr(self.xiv, 'urlopen', with_validators)
+        first = self.xiv.search('neural', max_results=2)
+        assert self.calls[0].get_header('If-modified-since') is None
+        for name in os.listdir(self.xiv.DEFAULT_CACHE_DIR):
+            path = os.path.join(self.xiv.DEFAULT_CACHE_DIR, name)
+            os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+        def not_modified(req):
+            self.calls.append(req)
+            raise self.xiv.HTTPError(req.get_full_url(), 304, 'Not Modified', {}, None)
+        monkeypatch.setattr(self.xiv, 'urlopen', not_modified)
+        assert self.xiv.search('neural', max_results=2) == first
+        assert self.calls[-1].get_header('If-modified-since') == validators['Last-Modified']
+        assert self.calls[-1].get_header('If-none-match') == validators['ETag']
+        for name in os.listdir(self.xiv.DEFAULT_CACHE_DIR):
+            assert time.time() - os.path.getmtime(os.path.join(self.xiv.DEFAULT_CACHE_DIR, name)) < 60
+
+    def test_expired_entry_without_validators_refetched_unconditionally(self):
+        self.xiv.search('neural', max_results=2)
+        assert [n for n in os.listdir(self.xiv.DEFAULT_CACHE_DIR) if n.endswith('.json')] == []
+        path = os.path.join(self.xiv.DEFAULT_CACHE_DIR, os.listdir(self.xiv.DEFAULT_CACHE_DIR)[0])
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+        self.xiv.search('neural', max_results=2)
+        assert self.calls[-1].get_header('If-modified-since') is None
+        assert self.calls[-1].get_header('If-none-match') is None
+
+    def test_non_304_error_on_revalidation_not_treated_as_fresh(self, monkeypatch, capsys):
+        first = self.xiv.search('neural', max_results=2)
+        path = os.path.join(self.xiv.DEFAULT_CACHE_DIR, os.listdir(self.xiv.DEFAULT_CACHE_DIR)[0])
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+        def not_found(req):
+            self.calls.append(req)
+            raise self.xiv.HTTPError(req.get_full_url(), 404, 'Not Found', {}, None)
+        monkeypatch.setattr(self.xiv, 'urlopen', not_found)
+        assert self.xiv.search('neural', max_results=2) == first
+        _, stderr = capsys.readouterr()
+        assert len(self.calls) == 2  # 404 is not retryable
+        assert 'Error: HTTP Error 404' in stderr
+        assert 'Warning: showing cached results' in stderr
+        assert time.time() - os.path.getmtime(path) > 3600  # The TTL was not restarted
+
+    def test_stale_entry_served_when_refetch_fails(self, monkeypatch, capsys):
+        first = self.xiv.search('neural', max_results=2)
+        path = os.path.join(self.xiv.DEFAULT_CACHE_DIR, os.listdir(self.xiv.DEFAULT_CACHE_DIR)[0])
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+        def unavailable(req):
+            self.calls.append(req)
+            raise self.xiv.HTTPError(req.get_full_url(), 503, 'Service Unavailable', {}, None)
+        monkeypatch.setattr(self.xiv, 'urlopen', unavailable)
+        monkeypatch.setattr(time, 'sleep', lambda s: None)
+        assert self.xiv.search('neural', max_results=2) == first
+        assert len(self.calls) == 1 + self.xiv.DEFAULT_RETRY_ATTEMPTS
+        assert 'Warning: showing cached results' in capsys.readouterr()[1]
+
+    def test_unparseable_reply_not_cached(self, monkeypatch):
+        body = b'<html><body>Service temporarily unavailable</body>'
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: self.calls.append(req) or MockResponse(body))
+        for _ in range(2):
+            with pytest.raises(self.xiv.ET.ParseError):
+                self.xiv.search('neural', max_results=2)
+        assert len(self.calls) == 2
+        assert not os.path.isdir(self.xiv.DEFAULT_CACHE_DIR) or os.listdir(self.xiv.DEFAULT_CACHE_DIR) == []
+
+    def test_stale_entries_pruned_on_write(self):
+        cache_dir = self.xiv.DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir)
+        stale = os.path.join(cache_dir, 'a' * 40 + '.xml')
+        foreign = os.path.join(cache_dir, 'notes.xml')
+        for path in (stale, foreign):
+            with open(path, 'wb') as f:
+                f.write(b'<feed/>')
+            old = time.time() - self.xiv.CACHE_MAX_AGE - 60
+            os.utime(path, (old, old))
+        self.xiv.search('neural', max_results=2)
+        assert not os.path.exists(stale) and os.path.exists(foreign)
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_disabled_by_zero_ttl(self, monkeypatch):
+        monkeypatch.setattr(self.xiv, 'DEFAULT_CACHE_TTL', 0)
+        self.xiv.search('neural', max_results=2)
+        self.xiv.search('neural', max_results=2)
+        assert len(self.calls) == 2 and not os.path.exists(self.xiv.DEFAULT_CACHE_DIR)
+
+    def test_unwritable_cache_dir_does_not_fail_search(self, monkeypatch, tmpdir):
+        blocker = os.path.join(tmpdir, 'file')
+        open(blocker, 'w').close()
+        monkeypatch.setattr(self.xiv, 'DEFAULT_CACHE_DIR', os.path.join(blocker, 'cache'))
+        assert len(self.xiv.search('neural', max_results=2)) == 2
+
+
 # Download function tests
 class TestDownload:
     @pytest.fixture(autouse=True)
-    def setup(self, xiv, monkeypatch, fixtures_dir, tmpdir):
+    def setup(self, xiv, monkeypatch, tmpdir):
         self.xiv = xiv
         self.tmpdir = tmpdir
-
-        def urlopen(url):
-            url_str = url.get_full_url() if hasattr(url, 'get_full_url') else str(url)
-            if 'arxiv.org/pdf/' in url_str:
-                fname = 'captcha.html' if 'captcha' in url_str else 'test.pdf'
-                with open(os.path.join(fixtures_dir, fname), 'rb') as f:
-                    return MockResponse(f.read())
-
-        monkeypatch.setattr(xiv, 'urlopen', urlopen)
+        monkeypatch.setattr(xiv, 'urlopen', mock_urlopen)
 
     def test_creates_output_directory(self):
         new_dir = os.path.join(self.tmpdir, 'subdir')
@@ -120,16 +308,110 @@ class TestDownload:
         assert result is True
         assert os.path.exists(os.path.join(self.tmpdir, '1234.5678.pdf'))
 
+    def test_streams_pdf_larger_than_chunk(self, monkeypatch):
+        content = b'%PDF-1.4\n' + b'\x00' * (self.xiv.DOWNLOAD_CHUNK_BYTES * 2 + 7)
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: MockResponse(content))
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is True
+        with open(os.path.join(self.tmpdir, '1234.5678.pdf'), 'rb') as f:
+            assert f.read() == content
+
     def test_detects_captcha_and_deletes_file(self):
         result = self.xiv.download('http://arxiv.org/abs/captcha', self.tmpdir)
         assert result == 'captcha'
         assert not os.path.exists(os.path.join(self.tmpdir, 'captcha.pdf'))
 
+    def test_html_content_type_is_captcha_without_reading_body(self, monkeypatch):
+        class UnreadResponse(MockResponse):
+            def read(self, size=-1):
+                pytest.fail("read body of an HTML response")
+        response = UnreadResponse(b'', {'Content-Type': 'text/html; charset=utf-8'})
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: response)
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) == 'captcha'
+        assert response.closed and os.listdir(self.tmpdir) == []
+
+    def test_skips_existing_complete_pdf(self, monkeypatch, capsys):
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is True
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: pytest.fail("refetched existing PDF"))
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) == 'exists'
+        assert 'exists' in capsys.readouterr()[1]
+
+    def test_redownloads_truncated_pdf(self):
+        path = os.path.join(self.tmpdir, '1234.5678.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4\n')
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is True
+        assert os.path.getsize(path) == len(load_fixture('test.pdf'))
+
+    def test_interrupted_transfer_leaves_no_partial_file(self, monkeypatch):
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: DroppedResponse(b'%PDF-1.4\n' + b'\x00' * 4096))
+        monkeypatch.setattr(time, 'sleep', lambda s: None)
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is False
+        assert os.listdir(self.tmpdir) == []
+
+    @pytest.mark.parametrize("code,range_start,saved", [
+        (206, 1024, True),   # Server resumed at the requested offset
+        (200, None, True),   # Server ignored the Range and sent the whole file
+        (206, 0, True),      # Server sent the whole file as a range from byte 0
+        (206, 2048, False),  # Range that matches neither: rejected rather than corrupting the PDF
+    ])
+    def test_retry_resumes_partial_download(self, monkeypatch, code, range_start, saved):
+        content = b'%PDF-1.4\n' + b'\x01' * 4096
+        requests = []
+
+        def flaky(req):
+            requests.append(req)
+            if len(requests) == 1:
+                return DroppedResponse(content)
+            if code == 200:
+                return MockResponse(content)
+            content_range = 'bytes %d-%d/%d' % (range_start, len(content) - 1, len(content))
+            return MockResponse(content[range_start:], {'Content-Range': content_range}, code)
+        monkeypatch.setattr(self.xiv, 'urlopen', flaky)
+        monkeypatch.setattr(time, 'sleep', lambda s: None)
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is saved
+        assert requests[1].get_header('Range') == 'bytes=%d-' % self.xiv.CAPTCHA_CHECK_BYTES
+        if not saved:
+            assert os.listdir(self.tmpdir) == []
+            return
+        assert os.listdir(self.tmpdir) == ['1234.5678.pdf']
+        with open(os.path.join(self.tmpdir, '1234.5678.pdf'), 'rb') as f:
+            assert f.read() == content
+
+    def test_captcha_on_resumed_attempt_deletes_partial_file(self, monkeypatch):
+        responses = [DroppedResponse(b'%PDF-1.4\n' + b'\x00' * 4096),
+                     MockResponse(b'<html>captcha</html>', {'Content-Type': 'text/html'})]
+        parts = []
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: responses.pop(0))
+        monkeypatch.setattr(time, 'sleep', lambda s: parts.extend(os.listdir(self.tmpdir)))
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) == 'captcha'
+        assert parts == ['1234.5678.pdf.part']  # The resumed attempt had a partial file to continue
+        assert os.listdir(self.tmpdir) == []
+
+    def test_cancelled_retry_deletes_partial_file(self, monkeypatch, capsys):
+        parts = []
+
+        def cancel(seconds):
+            parts.extend(os.listdir(self.tmpdir))
+            raise KeyboardInterrupt
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: DroppedResponse(b'%PDF-1.4\n' + b'\x00' * 4096))
+        monkeypatch.setattr(time, 'sleep', cancel)
+        assert self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir) is False
+        assert parts == ['1234.5678.pdf.part']
+        assert os.listdir(self.tmpdir) == []
+        assert 'cancelled' in capsys.readouterr()[1]
+
     def test_handles_paper_id_with_version(self):
         result = self.xiv.download('http://arxiv.org/abs/2510.14968v1', self.tmpdir)
         assert result is True
         assert os.path.exists(os.path.join(self.tmpdir, '2510.14968v1.pdf'))
 
+    def test_handles_old_style_paper_id(self, monkeypatch):
+        urls = []
+        monkeypatch.setattr(self.xiv, 'urlopen', lambda req: urls.append(req.get_full_url()) or mock_urlopen(req))
+        assert self.xiv.download('http://arxiv.org/abs/hep-th/9901001v1', self.tmpdir) is True
+        assert urls == ['https://arxiv.org/pdf/hep-th/9901001v1.pdf']
+        assert os.path.exists(os.path.join(self.tmpdir, 'hep-th-9901001v1.pdf'))
+
     def test_handles_directory_creation_failure(self, monkeypatch, capsys):
         """Test download() handles OSError when creating directory"""
         def mock_makedirs(path):
@@ -138,8 +420,7 @@ class TestDownload:
         monkeypatch.setattr(os, 'makedirs', mock_makedirs)
         result = self.xiv.download('http://arxiv.org/abs/1234.5678', '/nonexistent/deeply/nested/path')
         assert result is False
-        captured = capsys.readouterr()
-        err = captured.err if hasattr(captured, 'err') else captured[1]
+        _, err = capsys.readouterr()
         assert 'Cannot create directory' in err
 
     def test_cleans_up_file_on_retry_failure(self, monkeypatch, capsys):
@@ -163,8 +444,7 @@ class TestDownload:
         result = self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir,
                                    title='A Very Long Paper Title That Should Be Truncated', formatted=0)
         assert result is True
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert 'OK    (A Very Long Paper' in stderr and '...)' in stderr
 
     def test_displays_formatted_title(self, capsys):
@@ -172,8 +452,7 @@ class TestDownload:
         result = self.xiv.download('http://arxiv.org/abs/1234.5678', self.tmpdir,
                                    title='Test Paper', formatted=1)
         assert result is True
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert '\033[92mOK\033[0m' in stderr and '\033[90m(Test Paper)\033[0m' in stderr
 
 
@@ -186,6 +465,7 @@ class TestRetryWithBackoff:
     def test_retries_with_exponential_backoff(self, xiv, monkeypatch, capsys):
         attempts, sleeps = [0], []
         monkeypatch.setattr(time, 'sleep', lambda s: sleeps.append(s))
+        monkeypatch.setattr(xiv.random, 'uniform', lambda a, b: 1.0)
 
         def op():
             attempts[0] += 1
@@ -196,6 +476,23 @@ class TestRetryWithBackoff:
         result = xiv.retry_with_backoff(op, "Test")
         assert result == "success" and attempts[0] == 3 and sleeps == [1, 2]
 
+    def test_backoff_is_jittered_and_capped(self, xiv):
+        delays = [xiv.retry_delay(Exception("HTTP Error 503"), 1) for _ in range(50)]
+        assert all(1.0 <= d <= 3.0 for d in delays) and len(set(delays)) > 1
+        assert xiv.retry_delay(Exception("HTTP Error 503"), 10) == xiv.MAX_RETRY_WAIT
+
+    @pytest.mark.parametrize("retry_after,expected", [('5', 5), ('3600', 60), ('garbage', None)])
+    def test_honors_retry_after_seconds(self, xiv, retry_after, expected):
+        error = xiv.HTTPError('http://x', 503, 'Unavailable', {'Retry-After': retry_after}, None)
+        delay = xiv.retry_delay(error, 0)
+        assert delay == expected if expected is not None else 0.5 <= delay <= 1.5
+
+    def test_honors_retry_after_http_date(self, xiv):
+        from email.utils import formatdate
+        error = xiv.HTTPError('http://x', 503, 'Unavailable',
+                              {'Retry-After': formatdate(time.time() + 10, usegmt=True)}, None)
+        assert 8 <= xiv.retry_delay(error, 0) <= 10
+
     def test_gives_up_after_max_attempts(self, xiv, monkeypatch, capsys):
         attempts = [0]
         monkeypatch.setattr(time, 'sleep', lambda s: None)
@@ -235,28 +532,45 @@ class TestHelpers:
         ("HTTP Error 502 Bad Gateway", True),
         ("504 Gateway Timeout", True),
         ("Connection timeout", True),
+        ("HTTP Error 429: Too Many Requests", True),
         ("HTTP Error 404: Not Found", False),
     ])
     def test_is_retryable_error(self, xiv, error, expected):
         assert xiv.is_retryable_error(Exception(error)) == expected
 
+    @pytest.mark.parametrize("code,expected", [(429, True), (503, True), (504, True), (404, False), (500, False)])
+    def test_is_retryable_http_error_by_status(self, xiv, code, expected):
+        # The URL mentions 503 to show the decision uses the status code, not the message
+        error = xiv.HTTPError('http://export.arxiv.org/abs/1503.00001', code, 'msg', {}, None)
+        assert xiv.is_retryable_error(error) == expected
+
+    def test_is_retryable_wrapped_socket_timeout(self, xiv):
+        import socket
+        assert xiv.is_retryable_error(xiv.URLError(socket.timeout('timed out')))
+        assert not xiv.is_retryable_error(xiv.URLError('Name or service not known'))
+
+    def test_is_retryable_connection_reset(self, xiv):
+        import socket, errno
+        reset = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        assert xiv.is_retryable_error(reset) and xiv.is_retryable_error(xiv.URLError(reset))
+        assert not xiv.is_retryable_error(socket.error(errno.ECONNREFUSED, 'Connection refused'))
+
+    def test_open_url_sets_user_agent_and_extra_headers(self, xiv, monkeypatch):
+        requests = []
+        monkeypatch.setattr(xiv, 'urlopen', lambda req: requests.append(req))
+        xiv.open_url('https://arxiv.org/pdf/1.pdf', {'Range': 'bytes=10-'})
+        assert requests[0].get_header('User-agent') == 'xiv/%s' % xiv.__version__
+        assert requests[0].get_header('Range') == 'bytes=10-'
+
     @pytest.mark.parametrize("content,expected", [
         (b'<html><body>CAPTCHA</body></html>', True),
         (b'This file contains captcha verification', True),
         (b'<!DOCTYPE html><html></html>', True),
         (b'%PDF-1.4\n%\xE2\xE3\xCF\xD3\n', False),
+        (b'%PDF-1.4\n/Title (CAPTCHA robustness)', False),  # PDF magic wins over body text
     ])
-    def test_is_captcha(self, xiv, tmpdir, content, expected):
-        path = os.path.join(tmpdir, 'test.pdf')
-        with open(path, 'wb') as f:
-            f.write(content)
-        assert xiv.is_captcha(path) == expected
-
-    def test_is_captcha_skips_large_files(self, xiv, tmpdir):
-        path = os.path.join(tmpdir, 'large.pdf')
-        with open(path, 'wb') as f:
-            f.write(b'%PDF-1.4\n' + b'\x00' * 200000)
-        assert not xiv.is_captcha(path)
+    def test_is_captcha_content(self, xiv, content, expected):
+        assert xiv.is_captcha_content(content) == expected
 
 
 # Format function tests
@@ -272,23 +586,40 @@ class TestFormatting:
 
     def test_format_json(self, xiv, papers, capsys):
         xiv.format_papers(papers, 'json')
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         data = json.loads(output)
         assert isinstance(data, list) and len(data) == 2 and data[0]['title'] == 'First'
 
+    @pytest.mark.parametrize("tty,separator", [(False, '"title":"First"'), (True, '"title": "First"')])
+    def test_format_json_compact_when_piped(self, xiv, papers, capsys, monkeypatch, tty, separator):
+        monkeypatch.setattr(sys.stdout, 'isatty', lambda: tty)
+        xiv.format_papers(papers, 'json')
+        output, _ = capsys.readouterr()
+        assert separator in output and json.loads(output)[0]['title'] == 'First'
+
     def test_format_compact(self, xiv, papers, capsys):
         xiv.format_papers(papers, 'compact')
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert '[1, 2025-10-16]' in output and 'First' in output
 
+    def test_format_compact_one_line_per_paper(self, xiv, papers, capsys):
+        xiv.format_papers(papers, 'compact')
+        assert capsys.readouterr()[0].splitlines() == ['[1, 2025-10-16] First', '[2, 2025-10-15] Second']
+        xiv.format_papers([], 'compact')
+        assert capsys.readouterr()[0] == ''
+
     def test_format_detailed(self, xiv, papers, capsys):
         xiv.format_papers(papers, 'detailed')
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert all(x in output for x in ['[1] First', 'Alice', '2025-10-16', 'Abstract 1'])
 
+    def test_format_detailed_layout(self, xiv, papers, capsys):
+        xiv.format_papers(papers[:1], 'detailed')
+        lines = capsys.readouterr()[0].split('\n')
+        assert lines[:2] == ['', '[1] First'] and lines[-1] == '' and len(lines) == 6
+        xiv.format_papers([], 'detailed')
+        assert capsys.readouterr()[0] == ''
+
 
 # Batch download tests
 class TestDownloadPapers:
@@ -312,26 +643,42 @@ class TestDownloadPapers:
         papers = [{'link': 'http://arxiv.org/abs/1', 'title': 'P1'},
                   {'link': 'http://arxiv.org/abs/2', 'title': 'P2'}]
         self.xiv.download_papers(papers, self.tmpdir)
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert 'Rate limiting' in stderr
 
     def test_shows_progress(self, capsys):
         papers = [{'link': 'http://arxiv.org/abs/1', 'title': 'P1'},
                   {'link': 'http://arxiv.org/abs/2', 'title': 'P2'}]
         self.xiv.download_papers(papers, self.tmpdir)
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert '[1/2]' in stderr and '[2/2]' in stderr
 
+    def test_existing_papers_skip_delay_and_are_counted(self, monkeypatch, capsys):
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', lambda s: sleeps.append(s))
+        monkeypatch.setattr(self.xiv, 'download', lambda link, d, title='', fmt=0: 'exists' if link.endswith('1') else True)
+        papers = [{'link': 'http://arxiv.org/abs/1', 'title': 'P1'},
+                  {'link': 'http://arxiv.org/abs/2', 'title': 'P2'}]
+        self.xiv.download_papers(papers, self.tmpdir)
+        _, stderr = capsys.readouterr()
+        assert sleeps == [] and '2/2 saved, 1 already present' in stderr
+
+    def test_skips_duplicate_papers(self, capsys):
+        papers = [{'link': 'http://arxiv.org/abs/1', 'title': 'P1'},
+                  {'link': 'http://arxiv.org/abs/2', 'title': 'P2'},
+                  {'link': 'http://arxiv.org/abs/1', 'title': 'P1'}]
+        self.xiv.download_papers(papers, self.tmpdir)
+        _, stderr = capsys.readouterr()
+        assert self.downloads == ['http://arxiv.org/abs/1', 'http://arxiv.org/abs/2']
+        assert 'Skipping 1 duplicate paper\n' in stderr and '2/2 saved' in stderr
+
     def test_reports_captcha_count(self, monkeypatch, capsys):
         monkeypatch.setattr(self.xiv, 'download', lambda link, d, title='', fmt=0: 'captcha' if '1' in link else True)
 
         papers = [{'link': 'http://arxiv.org/abs/1', 'title': 'P1'},
                   {'link': 'http://arxiv.org/abs/2', 'title': 'P2'}]
         self.xiv.download_papers(papers, self.tmpdir)
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert '1/2 saved' in stderr and '1 CAPTCHA blocked' in stderr
 
     def test_keyboard_interrupt_exits_with_130(self, monkeypatch):
@@ -343,12 +690,30 @@ class TestDownloadPapers:
             self.xiv.download_papers(papers, self.tmpdir)
         assert e.value.code == 130
 
+    def test_delay_counts_download_time(self, monkeypatch):
+        """Delay is measured start-to-start, so slow downloads shorten the sleep"""
+        clock, sleeps = [0.0], []
+        monkeypatch.setattr(self.xiv, '_monotonic', lambda: clock[0])
+        monkeypatch.setattr(self.xiv, 'download', lambda link, d, title='', fmt=0: clock.__setitem__(0, clock[0] + 1.0) or True)
+        monkeypatch.setattr(self.xiv, 'DEFAULT_DOWNLOAD_DELAY', 3.0)
+        monkeypatch.setattr(time, 'sleep', lambda s: sleeps.append(s))
+        papers = [{'link': 'http://arxiv.org/abs/%d' % i, 'title': 'P%d' % i} for i in range(3)]
+        self.xiv.download_papers(papers, self.tmpdir)
+        assert sleeps == [2.0, 2.0]
+
 
 # CLI tests
+class FrozenDatetime(datetime):
+    """datetime with a fixed now() so date arithmetic in main() is deterministic"""
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 10, 23, 12, 0, 0)
+
 class TestCLI:
     @pytest.fixture(autouse=True)
     def setup(self, xiv, monkeypatch):
         self.xiv = xiv
+        monkeypatch.setattr(xiv, 'datetime', FrozenDatetime)
         self.search_calls = []
         self.download_calls = []
 
@@ -387,8 +752,7 @@ class TestCLI:
         self.xiv.main()
         call = self.search_calls[0]
         since = call[0][3] if len(call[0]) > 3 else call[1].get('since')
-        expected = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        assert since == expected
+        assert since == '2025-10-16'
 
     def test_sort_option(self, monkeypatch, capsys):
         monkeypatch.setattr(sys, 'argv', ['xiv', 'test', '-s', 'relevance'])
@@ -404,8 +768,7 @@ class TestCLI:
     def test_output_formats(self, monkeypatch, capsys, args, format_check):
         monkeypatch.setattr(sys, 'argv', ['xiv', 'test'] + args)
         self.xiv.main()
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert format_check(output)
 
     def test_download_option_triggers_download(self, monkeypatch, capsys, tmpdir):
@@ -416,40 +779,35 @@ class TestCLI:
 
 # Environment variable tests
 class TestEnvironment:
-    @pytest.mark.parametrize("var,value,attr,expected", [
-        ('XIV_MAX_RESULTS', '42', 'DEFAULT_RESULTS', 42),
-        ('XIV_CATEGORY', 'cs.AI', 'DEFAULT_CATEGORY', 'cs.AI'),
-        ('XIV_SORT', 'relevance', 'DEFAULT_SORT', 'relevance'),
-        ('XIV_PDF_DIR', 'my_papers', 'DEFAULT_PDF_DIR', 'my_papers'),
-        ('XIV_DOWNLOAD_DELAY', '5.0', 'DEFAULT_DOWNLOAD_DELAY', 5.0),
-        ('XIV_RETRY_ATTEMPTS', '5', 'DEFAULT_RETRY_ATTEMPTS', 5),
-    ])
-    def test_environment_variables(self, monkeypatch, var, value, attr, expected):
-        monkeypatch.setenv(var, value)
-
-        import xiv
-        if sys.version_info >= (3, 4):
-            import importlib
-            importlib.reload(xiv)
-        elif sys.version_info[0] >= 3:
-            import imp
-            imp.reload(xiv)
-        else:
-            reload(xiv)  # noqa: F821
-
-        assert getattr(xiv, attr) == expected
+    def test_environment_variables(self):
+        """Env vars are read at import; checked together in one fresh interpreter"""
+        import subprocess
+        cases = [
+            ('XIV_MAX_RESULTS', '42', 'DEFAULT_RESULTS', 42),
+            ('XIV_CATEGORY', 'cs.AI', 'DEFAULT_CATEGORY', 'cs.AI'),
+            ('XIV_SORT', 'relevance', 'DEFAULT_SORT', 'relevance'),
+            ('XIV_PDF_DIR', 'my_papers', 'DEFAULT_PDF_DIR', 'my_papers'),
+            ('XIV_DOWNLOAD_DELAY', '5.0', 'DEFAULT_DOWNLOAD_DELAY', 5.0),
+            ('XIV_RETRY_ATTEMPTS', '5', 'DEFAULT_RETRY_ATTEMPTS', 5),
+            ('XIV_CACHE_TTL', '600', 'DEFAULT_CACHE_TTL', 600),
+            ('XIV_CACHE_DIR', 'my_cache', 'DEFAULT_CACHE_DIR', 'my_cache'),
+        ]
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+        env.update((var, value) for var, value, _, _ in cases)
+        script = 'import json, xiv; print(json.dumps([getattr(xiv, a) for a in %r]))' % [c[2] for c in cases]
+        out = subprocess.check_output([sys.executable, '-c', script], env=env)
+        assert json.loads(out.decode('utf-8')) == [c[3] for c in cases]
 
 
 # XML parsing and edge cases
 class TestEdgeCases:
     def test_malformed_xml_raises_parse_error(self, xiv, monkeypatch):
         monkeypatch.setattr(xiv, 'urlopen', lambda u: MockResponse(b'<broken><xml></broken>'))
-        with pytest.raises(ET.ParseError):
+        with pytest.raises(xiv.ET.ParseError):
             xiv.search('test', max_results=10)
 
     def test_unicode_handling(self, xiv, monkeypatch):
-        if sys.version_info[0] >= 3:
-            xml = '''<?xml version="1.0" encoding="UTF-8"?>
+        xml = u'''<?xml version="1.0" encoding="UTF-8"?>
 <feed xmlns="http://www.w3.org/2005/Atom">
   <entry>
     <id>http://arxiv.org/abs/1</id>
@@ -458,21 +816,11 @@ class TestEdgeCases:
     <author><name>José García</name></author>
     <summary>Abstract</summary>
   </entry>
-</feed>'''
-        else:
-            xml = u'''<?xml version="1.0" encoding="UTF-8"?>
-<feed xmlns="http://www.w3.org/2005/Atom">
-  <entry>
-    <id>http://arxiv.org/abs/1</id>
-    <title>Étude</title>
-    <published>2025-10-16T12:00:00Z</published>
-    <author><name>José García</name></author>
-    <summary>Abstract</summary>
-  </entry>
 </feed>'''
         monkeypatch.setattr(xiv, 'urlopen', lambda _: MockResponse(xml.encode('utf-8')))
         papers = xiv.search('test', max_results=10)
-        assert len(papers) == 1 and 'Jos' in papers[0]['authors']
+        assert len(papers) == 1
+        assert papers[0]['title'] == u'Étude with 中文' and papers[0]['authors'] == u'José García'
 
     def test_no_results_exits_with_code_1(self, xiv, monkeypatch):
         monkeypatch.setattr(xiv, 'search', lambda *_, **__: [])
@@ -507,11 +855,8 @@ class TestEdgeCases:
         assert len(papers) == 1 and papers[0]['authors'] == ''
 
     @pytest.mark.parametrize("query", ['', 'test&query=special<>chars'])
-    def test_handles_special_queries(self, xiv, monkeypatch, fixtures_dir, query):
-        def urlopen(u):
-            with open(os.path.join(fixtures_dir, 'arxiv_response.xml'), 'rb') as f:
-                return MockResponse(f.read())
-        monkeypatch.setattr(xiv, 'urlopen', urlopen)
+    def test_handles_special_queries(self, xiv, monkeypatch, query):
+        monkeypatch.setattr(xiv, 'urlopen', lambda u: fixture_response('arxiv_response.xml'))
         papers = xiv.search(query, max_results=1)
         assert isinstance(papers, list)
 
@@ -530,14 +875,25 @@ class TestEdgeCases:
         papers = xiv.search('test', max_results=10)
         assert len(papers) == 1 and len(papers[0]['title']) == 10000
 
+    @pytest.mark.parametrize("sort,expected", [
+        ('submittedDate', ['1']),            # Newest-first: stop at the first older entry
+        ('relevance', ['1', '3']),           # Unordered dates: keep scanning
+    ])
+    def test_since_filter_stops_early_only_for_date_sort(self, xiv, monkeypatch, sort, expected):
+        entry = '<entry><id>http://arxiv.org/abs/%s</id><title>T</title><summary>S</summary><published>%sT00:00:00Z</published></entry>'
+        xml = '<feed xmlns="http://www.w3.org/2005/Atom">%s</feed>' % ''.join(
+            entry % (i, d) for i, d in [('1', '2025-10-16'), ('2', '2025-10-10'), ('3', '2025-10-15')])
+        monkeypatch.setattr(xiv, 'urlopen', lambda u: MockResponse(xml))
+        papers = xiv.search('test', sort=sort, since='2025-10-12')
+        assert [p['link'].rsplit('/', 1)[-1] for p in papers] == expected
+
     def test_download_retry_on_error(self, xiv, monkeypatch, tmpdir):
         attempts = [0]
         def urlopen(u):
             attempts[0] += 1
             if attempts[0] < 2:
                 raise Exception("HTTP Error 503")
-            with open('tests/fixtures/test.pdf', 'rb') as f:
-                return MockResponse(f.read())
+            return fixture_response('test.pdf')
 
         monkeypatch.setattr(xiv, 'urlopen', urlopen)
         monkeypatch.setattr(time, 'sleep', lambda s: None)
@@ -559,9 +915,24 @@ class TestEdgeCases:
         result = xiv.download('http://arxiv.org/abs/1', tmpdir)
         assert result is False and attempts[0] == 1
 
-    def test_broken_pipe_handling(self):
+    @pytest.mark.skipif(not hasattr(signal, 'SIGPIPE'), reason="no SIGPIPE on Windows")
+    def test_script_restores_default_sigpipe(self, monkeypatch):
+        """Running as a script resets SIGPIPE before main(), so closed pipes exit quietly"""
+        import runpy
+        calls = []
+        monkeypatch.setattr(signal, 'signal', lambda sig, handler: calls.append((sig, handler)))
+        monkeypatch.setattr(sys, 'argv', ['xiv', '-v'])
+        with pytest.raises(SystemExit) as e:
+            runpy.run_path(os.path.join(ROOT_DIR, 'xiv.py'), run_name='__main__')
+        assert e.value.code == 0
+        assert (signal.SIGPIPE, signal.SIG_DFL) in calls
+
+    def test_broken_pipe_handling(self, integration_mode):
+        """Spawns a real xiv process that queries arXiv, so only runs with --integration"""
+        if not integration_mode:
+            pytest.skip("requires --integration")
         import subprocess
-        proc = subprocess.Popen([sys.executable, 'xiv.py'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'xiv.py')], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         proc.stdout.close()
         proc.wait()
         stderr = proc.stderr.read().decode('utf-8')
@@ -579,6 +950,7 @@ class TestParseIndices:
         ('1,3-5,8', 10, [0, 2, 3, 4, 7]),
         ('5-7,2,9', 10, [1, 4, 5, 6, 8]),
         ('1, 3 , 5', 5, [0, 2, 4]),  # With spaces
+        ('2 - 4', 5, [1, 2, 3]),     # Spaced range
     ])
     def test_valid_index_specs(self, xiv, spec, total, expected):
         result = xiv.parse_indices(spec, total)
@@ -594,6 +966,8 @@ class TestParseIndices:
         ('abc', 5),        # Non-numeric
         ('1,a,3', 5),      # Mixed valid/invalid
         ('1.5', 5),        # Float
+        ('1,,3', 5),       # Empty item
+        ('1-2-3', 5),      # Chained range
         ('', 5),           # Empty string
         (None, 5),         # None
     ])
@@ -650,8 +1024,7 @@ class TestSelectiveDownload:
             for i in range(1, 11)
         ]
         self.xiv.download_papers(papers, self.tmpdir, indices=[0, 4, 9])
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert '[1/3]' in stderr and '[2/3]' in stderr and '[3/3]' in stderr
 
 
@@ -759,8 +1132,7 @@ class TestParseDownloadArgs:
         with pytest.raises(SystemExit) as e:
             xiv.validate_cli_args(Args())
         assert e.value.code == 1
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert 'Did you mean: -d /tmp/path 7,7' in stderr
 
 
@@ -787,19 +1159,14 @@ class TestEnvironmentValidation:
         ('XIV_MAX_AUTHORS', '0', 3, True),
         ('XIV_SORT', 'relevance', 'relevance', False),
         ('XIV_SORT', 'invalid', 'date', True),
+        ('XIV_CATEGORY', 'cs.AI cs.CV', 'cs.AI cs.CV', False),
+        ('XIV_CATEGORY', '   ', 'cs.RO', True),
+        ('XIV_CATEGORY', '', 'cs.RO', True),
     ])
-    def test_env_var_validation(self, monkeypatch, var, value, expected_val, should_warn, capsys):
+    def test_env_var_validation(self, configure_xiv, monkeypatch, var, value, expected_val, should_warn, capsys):
         monkeypatch.setenv(var, value)
 
-        import xiv
-        if sys.version_info >= (3, 4):
-            import importlib
-            importlib.reload(xiv)
-        elif sys.version_info[0] >= 3:
-            import imp
-            imp.reload(xiv)
-        else:
-            reload(xiv)  # noqa: F821
+        xiv = configure_xiv()
 
         attr_map = {
             'XIV_MAX_RESULTS': 'DEFAULT_RESULTS',
@@ -807,30 +1174,27 @@ class TestEnvironmentValidation:
             'XIV_RETRY_ATTEMPTS': 'DEFAULT_RETRY_ATTEMPTS',
             'XIV_MAX_AUTHORS': 'DEFAULT_MAX_AUTHORS',
             'XIV_SORT': 'DEFAULT_SORT',
+            'XIV_CATEGORY': 'DEFAULT_CATEGORY',
         }
         attr = attr_map[var]
         assert getattr(xiv, attr) == expected_val
 
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         if should_warn:
             assert 'Warning' in stderr
 
-    def test_download_delay_policy_warning(self, monkeypatch, capsys):
+    def test_load_config_reads_current_environment(self, xiv, monkeypatch):
+        """load_config returns fresh values without touching module globals"""
+        monkeypatch.setenv('XIV_MAX_RESULTS', '77')
+        assert xiv.load_config()['DEFAULT_RESULTS'] == 77
+        assert xiv.DEFAULT_RESULTS != 77
+
+    def test_download_delay_policy_warning(self, configure_xiv, monkeypatch, capsys):
         monkeypatch.setenv('XIV_DOWNLOAD_DELAY', '1.0')
 
-        import xiv
-        if sys.version_info >= (3, 4):
-            import importlib
-            importlib.reload(xiv)
-        elif sys.version_info[0] >= 3:
-            import imp
-            imp.reload(xiv)
-        else:
-            reload(xiv)  # noqa: F821
-
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        configure_xiv()
+
+        _, stderr = capsys.readouterr()
         assert 'API limits' in stderr and 'blocking' in stderr
 
     @pytest.mark.parametrize("category,known", [
@@ -849,8 +1213,7 @@ class TestEnvironmentValidation:
     def test_category_validation_warns(self, xiv, capsys, category, should_warn):
         """Category validation is case-insensitive; unknown categories trigger warning"""
         assert xiv.validate_category(category) is True
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert ('Unrecognized category' in stderr) == should_warn
 
 
@@ -885,8 +1248,7 @@ class TestCLIValidation:
         monkeypatch.setattr(sys, 'argv', ['xiv', 'test', '-n', '3000'])
         with pytest.raises(SystemExit) as e:
             xiv.main()
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert 'Warning' in stderr and '2000' in stderr
 
     def test_unknown_category_warns(self, xiv, monkeypatch, capsys):
@@ -895,8 +1257,8 @@ class TestCLIValidation:
         monkeypatch.setattr(sys, 'argv', ['xiv', 'test', '-c', 'unknown_cat', '-n', '1'])
         with pytest.raises(SystemExit):
             xiv.main()
-        out = capsys.readouterr()
-        assert 'Unrecognized category' in (out[1] if isinstance(out, tuple) else out.err)
+        _, stderr = capsys.readouterr()
+        assert 'Unrecognized category' in stderr
 
     @pytest.mark.parametrize("use_format,has_ansi", [(False, False), (True, True)])
     def test_warnings_respect_format_flag(self, xiv, monkeypatch, capsys, use_format, has_ansi):
@@ -908,8 +1270,7 @@ class TestCLIValidation:
         monkeypatch.setattr(sys, 'argv', args)
         with pytest.raises(SystemExit):
             xiv.main()
-        out = capsys.readouterr()
-        stderr = out[1] if isinstance(out, tuple) else out.err
+        _, stderr = capsys.readouterr()
         assert ('\033[' in stderr or '\x1b[' in stderr) == has_ansi
 
 
@@ -921,32 +1282,22 @@ class TestConfig:
             xiv.main()
         assert e.value.code == 0
 
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert 'XIV_MAX_RESULTS' in output
         assert 'XIV_DOWNLOAD_DELAY' in output
         assert 'violates API limits' in output
 
-    def test_config_shows_custom_values(self, xiv, monkeypatch, capsys):
+    def test_config_shows_custom_values(self, configure_xiv, monkeypatch, capsys):
         monkeypatch.setenv('XIV_MAX_RESULTS', '50')
         monkeypatch.setattr(sys, 'argv', ['xiv', '-e'])
 
-        import xiv as xiv_module
-        if sys.version_info >= (3, 4):
-            import importlib
-            importlib.reload(xiv_module)
-        elif sys.version_info[0] >= 3:
-            import imp
-            imp.reload(xiv_module)
-        else:
-            reload(xiv_module)  # noqa: F821
+        xiv = configure_xiv()
 
         with pytest.raises(SystemExit) as e:
-            xiv_module.main()
+            xiv.main()
         assert e.value.code == 0
 
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert '50' in output
 
 
@@ -965,8 +1316,7 @@ class TestFormatFunctionality:
     def test_format_output(self, xiv, paper, capsys, style, formatted, has_ansi):
         """Test formatting across styles"""
         xiv.format_papers([paper], style, formatted)
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert ('\033[' in output) == has_ansi
         assert 'Test' in output or (style == 'json' and '"title"' in output)
 
@@ -975,8 +1325,7 @@ class TestFormatFunctionality:
         paper = {'title': 'Multi', 'authors': 'Alice, Bob et al. (10)',
                  'published': '2025-10-16', 'link': 'http://arxiv.org/abs/1', 'abstract': 'Test'}
         xiv.format_papers([paper], 'detailed', 1)
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert ' et al. (' in output and '\033[93m' in output
 
     @pytest.mark.parametrize('argv,has_ansi', [
@@ -990,22 +1339,13 @@ class TestFormatFunctionality:
              'link': 'http://arxiv.org/abs/1', 'abstract': 'X'}])
         monkeypatch.setattr(sys, 'argv', argv)
         xiv.main()
-        out = capsys.readouterr()
-        output = out[0] if isinstance(out, tuple) else out.out
+        output, _ = capsys.readouterr()
         assert ('\033[' in output) == has_ansi
 
-    def test_xiv_format_env_var(self, monkeypatch):
+    def test_xiv_format_env_var(self, configure_xiv, monkeypatch):
         """XIV_FORMAT env var sets default"""
         monkeypatch.setenv('XIV_FORMAT', '1')
-        import xiv
-        if sys.version_info >= (3, 4):
-            import importlib
-            importlib.reload(xiv)
-        elif sys.version_info[0] >= 3:
-            import imp
-            imp.reload(xiv)
-        else:
-            reload(xiv)  # noqa: F821
+        xiv = configure_xiv()
         assert xiv.DEFAULT_FORMAT == 1
 
     def test_config_displays_format(self, xiv, monkeypatch, capsys):
@@ -8,9 +8,9 @@ Style choices are deliberate for compatibility:
 - Import compatibility blocks for urllib (Python 2/3 differences)
 - Explicit exception handling for platform differences (SIGPIPE on Windows)
 """
-import argparse, sys, os, json, re, time, signal
-import xml.etree.ElementTree as ET
+import argparse, sys, os, io, json, re, time, signal, hashlib, shutil, zlib, random, socket, errno
 from datetime import datetime, timedelta
+from email.utils import parsedate_tz, mktime_tz
 
 __version__ = "1.2.1"
 
@@ -18,23 +18,44 @@ __version__ = "1.2.1"
 try:
     from urllib.request import urlopen, Request
     from urllib.parse import urlencode
+    from urllib.error import HTTPError, URLError
 except ImportError:
-    from urllib2 import urlopen, Request
+    from urllib2 import urlopen, Request, HTTPError, URLError
     from urllib import urlencode
 
+# Python 2 needs the C accelerator imported explicitly; Python 3.3+ uses it by default
+try:
+    import xml.etree.cElementTree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
 NS = {
     'a': 'http://www.w3.org/2005/Atom',
     'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
 }
+# Clark-notation Atom tags, built once for the per-entry parsing loop
+ATOM_ENTRY, ATOM_TITLE, ATOM_AUTHOR, ATOM_NAME, ATOM_PUBLISHED, ATOM_SUMMARY, ATOM_ID = [
+    '{%s}%s' % (NS['a'], tag) for tag in ('entry', 'title', 'author', 'name', 'published', 'summary', 'id')]
 SORTS = {'date': 'submittedDate', 'updated': 'lastUpdatedDate', 'relevance': 'relevance'}
 
 # Constants
-MIN_VALID_PDF_SIZE = 100000         # PDFs are typically >100KB; smaller files are likely CAPTCHA pages
+MIN_VALID_PDF_SIZE = 100000         # PDFs are typically >100KB; smaller files on disk are fetched again
 CAPTCHA_CHECK_BYTES = 1024          # Read first 1KB to detect HTML CAPTCHA pages
+DOWNLOAD_CHUNK_BYTES = 1 << 20      # Stream PDFs to disk in 1MB chunks
 DATE_PREFIX_LENGTH = 10             # YYYY-MM-DD format
 MAX_TIME_RESULTS = 1000             # arXiv API limit for time-based queries
+CACHE_MAX_AGE = 7 * 86400           # Cached responses older than this (the TTL maximum) are pruned
 EXIT_SIGINT = 130                   # POSIX exit code for SIGINT (128 + 2)
-INDICES_PATTERN = r'^[\d,\-\s]+$'   # Pattern to detect index specifications like "1,3-5"
+MAX_RETRY_WAIT = 60                 # Ceiling in seconds for backoff and server Retry-After
+INDICES_PATTERN = re.compile(r'^[\d,\-\s]+$')  # Detects index specifications like "1,3-5"
+INDEX_PART_PATTERN = re.compile(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?\Z')  # One "N" or "N-M" item of a spec
+CAPTCHA_PATTERN = re.compile(b'<html|captcha|<!doctype', re.I)  # HTML markers in a non-PDF body
+RETRYABLE_PATTERN = re.compile(r'429|50[234]|timeout', re.I)  # Rate limiting, transient gateway errors, timeouts
+RETRYABLE_HTTP_CODES = frozenset((429, 502, 503, 504))
+RETRYABLE_ERRNOS = frozenset((errno.ECONNRESET, errno.ETIMEDOUT))  # Dropped or stalled connections
+AUTHOR_COUNT_PATTERN = re.compile(r'\((\d+)\)')  # "(12)" total after "et al."
+CACHE_FILE_PATTERN = re.compile(r'^[0-9a-f]{40}\.(xml|json)(\.\d+\.tmp)?$')  # Only files xiv wrote are pruned
+ARXIV_ID_PATTERN = re.compile(r'/abs/([^?#]+)$')  # Paper ID from abs link, incl. old-style archive/NNNNNNN
 
 def format_warning(msg, formatted=0):
     """Format warning message with optional color"""
@@ -94,17 +115,37 @@ def getenv_str(var, default, valid_values=None):
     return val
 
 # Configuration with validation
-DEFAULT_RESULTS = getenv_int('XIV_MAX_RESULTS', 10, min_val=1, max_val=2000)
-DEFAULT_CATEGORY = getenv_str('XIV_CATEGORY', 'cs.RO')
-DEFAULT_SORT = getenv_str('XIV_SORT', 'date', valid_values=['date', 'updated', 'relevance'])
-DEFAULT_PDF_DIR = getenv_str('XIV_PDF_DIR', 'papers')
-DEFAULT_DOWNLOAD_DELAY = getenv_float('XIV_DOWNLOAD_DELAY', 3.0, min_val=0.0, max_val=60.0)
-DEFAULT_RETRY_ATTEMPTS = getenv_int('XIV_RETRY_ATTEMPTS', 3, min_val=1, max_val=10)
-DEFAULT_MAX_AUTHORS = getenv_int('XIV_MAX_AUTHORS', 3, min_val=1, max_val=20)
-DEFAULT_FORMAT = getenv_int('XIV_FORMAT', 0, min_val=0, max_val=1)
+def load_config():
+    """Parse all XIV_* environment variables in one pass and return DEFAULT_* values by name"""
+    config = {
+        'DEFAULT_RESULTS': getenv_int('XIV_MAX_RESULTS', 10, min_val=1, max_val=2000),
+        'DEFAULT_CATEGORY': getenv_str('XIV_CATEGORY', 'cs.RO'),
+        'DEFAULT_SORT': getenv_str('XIV_SORT', 'date', valid_values=['date', 'updated', 'relevance']),
+        'DEFAULT_PDF_DIR': getenv_str('XIV_PDF_DIR', 'papers'),
+        'DEFAULT_DOWNLOAD_DELAY': getenv_float('XIV_DOWNLOAD_DELAY', 3.0, min_val=0.0, max_val=60.0),
+        'DEFAULT_RETRY_ATTEMPTS': getenv_int('XIV_RETRY_ATTEMPTS', 3, min_val=1, max_val=10),
+        'DEFAULT_MAX_AUTHORS': getenv_int('XIV_MAX_AUTHORS', 3, min_val=1, max_val=20),
+        'DEFAULT_FORMAT': getenv_int('XIV_FORMAT', 0, min_val=0, max_val=1),
+        'DEFAULT_CACHE_TTL': getenv_int('XIV_CACHE_TTL', 0, min_val=0, max_val=604800),
+        'DEFAULT_CACHE_DIR': getenv_str('XIV_CACHE_DIR', os.path.join(
+            os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'xiv')),
+    }
+
+    if not config['DEFAULT_CATEGORY'].split():
+        # A blank value would leave search() with no category to query
+        warn_env_fallback('XIV_CATEGORY', 'is blank', "'cs.RO'")
+        config['DEFAULT_CATEGORY'] = 'cs.RO'
+    elif os.getenv('XIV_CATEGORY'):
+        for cat in config['DEFAULT_CATEGORY'].split():
+            validate_category(cat, 'XIV_CATEGORY', config['DEFAULT_FORMAT'])
+
+    # Warn about potential arXiv policy violations
+    if config['DEFAULT_DOWNLOAD_DELAY'] < 3.0 and os.getenv('XIV_DOWNLOAD_DELAY'):
+        sys.stderr.write("Warning: XIV_DOWNLOAD_DELAY < 3.0 violates API limits and risks blocking\n")
+    return config
 
 # Known arXiv categories (updated 2025-10-26)
-ARXIV_CATEGORIES = {
+ARXIV_CATEGORIES = frozenset({
     'cs.AI', 'cs.AR', 'cs.CC', 'cs.CE', 'cs.CG', 'cs.CL', 'cs.CR', 'cs.CV', 'cs.CY', 'cs.DB',
     'cs.DC', 'cs.DL', 'cs.DM', 'cs.DS', 'cs.ET', 'cs.FL', 'cs.GL', 'cs.GR', 'cs.GT', 'cs.HC',
     'cs.IR', 'cs.IT', 'cs.LG', 'cs.LO', 'cs.MA', 'cs.MM', 'cs.MS', 'cs.NA', 'cs.NE', 'cs.NI',
@@ -126,12 +167,12 @@ ARXIV_CATEGORIES = {
     'q-bio.BM', 'q-bio.CB', 'q-bio.GN', 'q-bio.MN', 'q-bio.NC', 'q-bio.OT', 'q-bio.PE', 'q-bio.QM',
     'q-bio.SC', 'q-bio.TO', 'q-fin.CP', 'q-fin.EC', 'q-fin.GN', 'q-fin.MF', 'q-fin.PM', 'q-fin.PR',
     'q-fin.RM', 'q-fin.ST', 'q-fin.TR', 'stat.AP', 'stat.CO', 'stat.ME', 'stat.ML', 'stat.OT', 'stat.TH'
-}
-_ARXIV_CATEGORIES_LOWER = {c.lower() for c in ARXIV_CATEGORIES}
+})
+_ARXIV_CATEGORIES_LOWER = frozenset(c.lower() for c in ARXIV_CATEGORIES)
 
 def validate_category(cat, source='', formatted=None):
     """Check if category is known to arXiv. Returns True if valid, warns if unknown."""
-    if cat.lower() in _ARXIV_CATEGORIES_LOWER:
+    if cat in ARXIV_CATEGORIES or cat.lower() in _ARXIV_CATEGORIES_LOWER:  # Exact match skips lower()
         return True
     src = (" (%s)" % source) if source else ''
     fmt = formatted if formatted is not None else DEFAULT_FORMAT
@@ -139,18 +180,45 @@ def validate_category(cat, source='', formatted=None):
     sys.stderr.write(format_warning(msg, fmt))
     return True
 
-if os.getenv('XIV_CATEGORY'):
-    for cat in DEFAULT_CATEGORY.split():
-        validate_category(cat, 'XIV_CATEGORY')
+_config = load_config()
+DEFAULT_RESULTS = _config['DEFAULT_RESULTS']
+DEFAULT_CATEGORY = _config['DEFAULT_CATEGORY']
+DEFAULT_SORT = _config['DEFAULT_SORT']
+DEFAULT_PDF_DIR = _config['DEFAULT_PDF_DIR']
+DEFAULT_DOWNLOAD_DELAY = _config['DEFAULT_DOWNLOAD_DELAY']
+DEFAULT_RETRY_ATTEMPTS = _config['DEFAULT_RETRY_ATTEMPTS']
+DEFAULT_MAX_AUTHORS = _config['DEFAULT_MAX_AUTHORS']
+DEFAULT_FORMAT = _config['DEFAULT_FORMAT']
+DEFAULT_CACHE_TTL = _config['DEFAULT_CACHE_TTL']
+DEFAULT_CACHE_DIR = _config['DEFAULT_CACHE_DIR']
 
-# Warn about potential arXiv policy violations
-if DEFAULT_DOWNLOAD_DELAY < 3.0 and os.getenv('XIV_DOWNLOAD_DELAY'):
-    sys.stderr.write("Warning: XIV_DOWNLOAD_DELAY < 3.0 violates API limits and risks blocking\n")
+_monotonic = getattr(time, 'monotonic', time.time)  # Python 2.7, 3.3 fallback
 
 def is_retryable_error(error):
-    """Check if error is retryable (5xx errors or timeouts)"""
-    err_str = str(error).lower()
-    return any(code in err_str for code in ['503', '502', '504', 'timeout'])
+    """Check if error is retryable (429, gateway 5xx errors, timeouts or connection resets)"""
+    if isinstance(error, HTTPError):
+        return error.code in RETRYABLE_HTTP_CODES
+    if isinstance(error, URLError):
+        error = error.reason  # urlopen wraps socket errors, including timeouts
+    if isinstance(error, socket.timeout):
+        return True
+    if isinstance(error, EnvironmentError) and error.errno in RETRYABLE_ERRNOS:
+        return True  # socket.error on Python 2, ConnectionResetError/TimeoutError on Python 3
+    # Fall back to the message for errors raised outside urllib
+    return RETRYABLE_PATTERN.search(str(error)) is not None
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered 2**attempt"""
+    headers = getattr(error, 'hdrs', None)  # HTTPError headers on both py2 and py3
+    retry_after = headers.get('Retry-After') if headers is not None else None
+    if retry_after:
+        if retry_after.strip().isdigit():
+            return min(float(retry_after), MAX_RETRY_WAIT)
+        parsed = parsedate_tz(retry_after)  # HTTP-date form
+        if parsed:
+            return min(max(0.0, mktime_tz(parsed) - time.time()), MAX_RETRY_WAIT)
+    # Jitter keeps concurrent clients from retrying in lockstep
+    return min((2 ** attempt) * random.uniform(0.5, 1.5), MAX_RETRY_WAIT)
 
 def retry_with_backoff(operation, error_msg_prefix):
     """Execute operation with exponential backoff retry logic"""
@@ -159,8 +227,8 @@ def retry_with_backoff(operation, error_msg_prefix):
             return operation()
         except Exception as e:
             if attempt < DEFAULT_RETRY_ATTEMPTS - 1 and is_retryable_error(e):
-                wait_time = (2 ** attempt)
-                sys.stderr.write("%s (attempt %d/%d), retrying in %ds... (Ctrl+C to cancel)\n" %
+                wait_time = retry_delay(e, attempt)
+                sys.stderr.write("%s (attempt %d/%d), retrying in %.1fs... (Ctrl+C to cancel)\n" %
                                 (error_msg_prefix, attempt + 1, DEFAULT_RETRY_ATTEMPTS, wait_time))
                 try:
                     time.sleep(wait_time)
@@ -171,61 +239,189 @@ def retry_with_backoff(operation, error_msg_prefix):
                 sys.stderr.write("Error: %s\n" % e)
                 return None
 
+def open_url(url, headers=None):
+    """Open url with the xiv User-Agent plus any extra headers; all HTTP goes through here"""
+    all_headers = {'User-Agent': 'xiv/%s' % __version__}
+    if headers:
+        all_headers.update(headers)
+    return urlopen(Request(url, headers=all_headers))
+
+def cache_path(url, ext='.xml'):
+    """Return the cache file for a query URL; '.json' holds the response's validators"""
+    return os.path.join(DEFAULT_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + ext)
+
+def read_cache(url):
+    """Return (response, mtime, validators) cached for url, or (None, None, {}) if caching is off or nothing is stored"""
+    if not DEFAULT_CACHE_TTL:
+        return None, None, {}
+    path = cache_path(url)
+    try:
+        mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            xml = f.read()
+    except (IOError, OSError):
+        return None, None, {}
+    try:
+        with open(cache_path(url, '.json')) as f:
+            validators = json.load(f)
+    except (IOError, OSError, ValueError):
+        validators = {}  # Without validators the stale copy is simply refetched
+    return xml, mtime, validators
+
+def write_cache(url, xml, validators=None):
+    """Store response and its Last-Modified/ETag validators atomically; cache failures never fail the search"""
+    if not DEFAULT_CACHE_TTL:
+        return
+    files = [(cache_path(url), xml)]
+    if validators:
+        files.append((cache_path(url, '.json'), json.dumps(validators).encode('utf-8')))
+    try:
+        if not os.path.isdir(DEFAULT_CACHE_DIR):
+            os.makedirs(DEFAULT_CACHE_DIR)
+        if not validators and os.path.exists(cache_path(url, '.json')):
+            os.remove(cache_path(url, '.json'))  # Never pair a new body with the old body's validators
+        for path, data in files:
+            tmp = "%s.%d.tmp" % (path, os.getpid())
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                getattr(os, 'replace', os.rename)(tmp, path)  # os.replace is Python 3.3+
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    except (IOError, OSError):
+        return
+    prune_cache()
+
+def prune_cache():
+    """Delete cache files past CACHE_MAX_AGE; runs only after a fresh response is stored"""
+    cutoff = time.time() - CACHE_MAX_AGE
+    try:
+        names = os.listdir(DEFAULT_CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not CACHE_FILE_PATTERN.match(name):
+            continue
+        path = os.path.join(DEFAULT_CACHE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
 def search(query, max_results=10, sort='submittedDate', since=None, categories=None):
     """Query arXiv API and return list of matching papers"""
-    cat_query = " OR ".join("cat:" + c for c in categories) if categories else "cat:" + DEFAULT_CATEGORY
+    # XIV_CATEGORY may hold several space-separated categories, same as -c
+    cat_query = " OR ".join("cat:" + c for c in (categories or DEFAULT_CATEGORY.split()))
     search_query = "(%s) AND (%s)" % (cat_query, query)
+    url = "https://export.arxiv.org/api/query?" + urlencode({
+        'search_query': search_query, 'start': 0, 'max_results': max_results,
+        'sortBy': sort, 'sortOrder': 'descending'
+    })
+
+    cached, cached_at, cached_validators = read_cache(url)
+    validators = {}  # Filled by fetch_xml from the fresh response, stored alongside it
 
     def fetch_xml():
-        url = "https://export.arxiv.org/api/query?" + urlencode({
-            'search_query': search_query, 'start': 0, 'max_results': max_results,
-            'sortBy': sort, 'sortOrder': 'descending'
-        })
-        req = Request(url, headers={'User-Agent': 'xiv/%s' % __version__})
-        resp = urlopen(req)
-        xml = resp.read().decode('utf-8')
+        headers = {'Accept-Encoding': 'gzip'}
+        if cached is not None:
+            # Echo the server's own validators; a local mtime is not a date the server ever sent
+            if 'Last-Modified' in cached_validators:
+                headers['If-Modified-Since'] = cached_validators['Last-Modified']
+            if 'ETag' in cached_validators:
+                headers['If-None-Match'] = cached_validators['ETag']
+        try:
+            resp = open_url(url, headers)
+        except HTTPError as e:
+            if e.code != 304 or cached is None:
+                raise
+            for path in (cache_path(url), cache_path(url, '.json')):
+                try:
+                    os.utime(path, None)  # Revalidated: restart the TTL without a transfer
+                except OSError:
+                    pass
+            return cached
+        info = resp.info()
+        for name in ('Last-Modified', 'ETag'):
+            if info.get(name):
+                validators[name] = info.get(name)
+        xml = resp.read()  # Raw bytes: the parser honours the XML encoding declaration
         resp.close()
+        if xml[:2] == b'\x1f\x8b':  # gzip magic; Atom XML compresses several-fold on the wire
+            xml = zlib.decompress(xml, 16 + zlib.MAX_WBITS)
         return xml
 
-    xml = retry_with_backoff(fetch_xml, "ArXiv unavailable")
+    if cached is not None and time.time() - cached_at < DEFAULT_CACHE_TTL:
+        xml = cached
+    else:
+        xml = retry_with_backoff(fetch_xml, "ArXiv unavailable")
+        if not xml and cached is not None:
+            # A stale copy beats no results when arXiv cannot be reached
+            msg = "Warning: showing cached results from %s\n" % time.strftime('%Y-%m-%d %H:%M', time.localtime(cached_at))
+            sys.stderr.write(format_warning(msg, DEFAULT_FORMAT))
+            xml = cached
+    fetched = bool(xml) and xml is not cached
     if not xml:
         return []
 
-    try:
-        root = ET.fromstring(xml.encode('utf-8'))
-    except (UnicodeDecodeError, ET.ParseError):
-        root = ET.fromstring(xml)
-
+    # Stream entries and clear each one once read, so the parsed tree never holds the whole feed
     papers = []
-    for entry in root.findall('a:entry', NS):
-        pub = entry.find('a:published', NS).text[:DATE_PREFIX_LENGTH]
+    root = None
+    complete = True
+    for event, entry in ET.iterparse(io.BytesIO(xml), events=('start', 'end')):
+        if root is None:
+            root = entry  # <feed>, the first start event
+        if event != 'end' or entry.tag != ATOM_ENTRY:
+            continue
+        # One sweep over the entry's children instead of a find() scan per field; first occurrence wins
+        fields, authors = {}, []
+        for child in entry:
+            if child.tag == ATOM_AUTHOR:
+                authors.append(child)
+            else:
+                fields.setdefault(child.tag, child.text or '')
+
+        pub = fields.get(ATOM_PUBLISHED, '')[:DATE_PREFIX_LENGTH]
         if since and pub < since:
+            if sort == SORTS['date']:
+                complete = False
+                break  # Results are newest-first by publication date; the rest are older still
+            root.clear()
             continue
 
-        authors = [a.find('a:name', NS).text for a in entry.findall('a:author', NS)]
-        author_str = ", ".join(authors[:DEFAULT_MAX_AUTHORS])
+        # Only the displayed authors have their names extracted
+        author_str = ", ".join(a.findtext(ATOM_NAME, '') for a in authors[:DEFAULT_MAX_AUTHORS])
         if len(authors) > DEFAULT_MAX_AUTHORS:
             author_str += " et al. (%d)" % len(authors)
 
         papers.append({
-            'title': re.sub(r'\s+', ' ', entry.find('a:title', NS).text.strip()),
+            'title': ' '.join(fields.get(ATOM_TITLE, '').split()),
             'authors': author_str,
             'published': pub,
-            'link': entry.find('a:id', NS).text,
-            'abstract': re.sub(r'\s+', ' ', entry.find('a:summary', NS).text.strip())
+            'link': fields.get(ATOM_ID, ''),
+            'abstract': ' '.join(fields.get(ATOM_SUMMARY, '').split())
         })
+        root.clear()  # Detach finished entries so memory stays at one entry, not the whole feed
+
+    # Cache only replies that parsed; after an early stop the unread tail must at least be closed
+    if fetched and (complete or xml.rstrip().endswith(b'</feed>')):
+        write_cache(url, xml, validators)
     return papers
 
-def is_captcha(path):
-    """Detect if downloaded file is HTML CAPTCHA page instead of PDF"""
-    if os.path.getsize(path) >= MIN_VALID_PDF_SIZE:
+def is_captcha_content(head):
+    """Detect HTML CAPTCHA markers in the first bytes of a response"""
+    if head.startswith(b'%PDF-'):
         return False
-    with open(path, 'rb') as f:
-        content = f.read(CAPTCHA_CHECK_BYTES).lower()
-    return b'<html' in content or b'captcha' in content or b'<!doctype' in content
+    return CAPTCHA_PATTERN.search(head) is not None
+
+def arxiv_id(link):
+    """Paper ID from an abs link, falling back to the last path segment"""
+    match = ARXIV_ID_PATTERN.search(link)
+    return match.group(1) if match else link.split('/')[-1]
 
 def download(link, output_dir, title='', formatted=0):
-    """Download single paper PDF with retry logic. Returns True, False, or 'captcha'"""
+    """Download single paper PDF with retry logic. Returns True, False, 'captcha', or 'exists'"""
     if not os.path.exists(output_dir):
         try:
             os.makedirs(output_dir)
@@ -233,53 +429,78 @@ def download(link, output_dir, title='', formatted=0):
             sys.stderr.write("Error: Cannot create directory '%s': %s\n" % (output_dir, e))
             return False
 
-    paper_id = link.split('/')[-1]
+    paper_id = arxiv_id(link)
     path = os.path.join(output_dir, paper_id.replace('/', '-') + '.pdf')
+    part = path + '.part'
 
     sys.stderr.write("  %s... " % paper_id)
     sys.stderr.flush()
 
+    # API links carry a version suffix whose content never changes, so a complete earlier download is reused
+    if os.path.isfile(path) and os.path.getsize(path) >= MIN_VALID_PDF_SIZE:
+        with open(path, 'rb') as f:
+            if f.read(5) == b'%PDF-':
+                sys.stderr.write("exists\n")
+                return 'exists'
+
     def fetch_pdf():
         """Fetch PDF and detect CAPTCHA. Returns True or 'captcha', raises on error."""
         pdf_url = "https://arxiv.org/pdf/%s.pdf" % paper_id
-        req = Request(pdf_url, headers={'User-Agent': 'xiv/%s' % __version__})
-        r = urlopen(req)
-        with open(path, 'wb') as f:
-            f.write(r.read())
-        r.close()
-
-        if is_captcha(path):
-            os.remove(path)
-            return 'captcha'
+        # Bytes kept from an interrupted attempt are resumed rather than fetched again
+        offset = os.path.getsize(part) if os.path.isfile(part) else 0
+        r = open_url(pdf_url, {'Range': 'bytes=%d-' % offset} if offset else None)
+        try:
+            # An HTML response is never the PDF; bail out before reading the body
+            if (r.info().get('Content-Type') or '').lower().startswith('text/html'):
+                return 'captcha'
+            content_range = r.info().get('Content-Range') or ''
+            if offset and r.getcode() == 206 and content_range.startswith('bytes %d-' % offset):
+                with open(part, 'ab') as f:
+                    shutil.copyfileobj(r, f, DOWNLOAD_CHUNK_BYTES)
+            else:  # Fresh download, or the server ignored the Range and sent the whole file
+                if r.getcode() == 206 and not content_range.startswith('bytes 0-'):
+                    # Neither our resume point nor the whole file: saving it would corrupt the PDF
+                    raise IOError("unexpected Content-Range '%s'" % content_range)
+                # Check the head in memory so CAPTCHA pages never touch the disk
+                head = r.read(CAPTCHA_CHECK_BYTES)
+                if is_captcha_content(head):
+                    return 'captcha'
+                with open(part, 'wb') as f:
+                    f.write(head)
+                    shutil.copyfileobj(r, f, DOWNLOAD_CHUNK_BYTES)
+        finally:
+            r.close()
+        getattr(os, 'replace', os.rename)(part, path)  # os.replace is Python 3.3+
         return True
 
     for attempt in range(DEFAULT_RETRY_ATTEMPTS):
         try:
             result = fetch_pdf()
             if result == 'captcha':
+                if os.path.exists(part):
+                    os.remove(part)
                 sys.stderr.write("CAPTCHA\n")
                 return 'captcha'
-            ok_msg = '\033[92mOK\033[0m' if formatted else 'OK'
-            sys.stderr.write(ok_msg)
+            msg = '\033[92mOK\033[0m' if formatted else 'OK'
             if title:
                 truncated = (title[:20] + '...') if len(title) > 23 else title
-                if formatted:
-                    sys.stderr.write('    \033[90m(%s)\033[0m' % truncated)
-                else:
-                    sys.stderr.write('    (%s)' % truncated)
-            sys.stderr.write('\n')
+                msg += ('    \033[90m(%s)\033[0m' if formatted else '    (%s)') % truncated
+            sys.stderr.write(msg + '\n')
             return True
         except Exception as e:
-            if os.path.exists(path):
-                os.remove(path)
+            retry = attempt < DEFAULT_RETRY_ATTEMPTS - 1 and is_retryable_error(e)
+            if not retry and os.path.exists(part):
+                os.remove(part)  # Partial data is only kept for the next attempt to resume
 
-            if attempt < DEFAULT_RETRY_ATTEMPTS - 1 and is_retryable_error(e):
-                wait_time = (2 ** attempt)
-                sys.stderr.write("retry %ds... " % wait_time)
+            if retry:
+                wait_time = retry_delay(e, attempt)
+                sys.stderr.write("retry %.1fs... " % wait_time)
                 sys.stderr.flush()
                 try:
                     time.sleep(wait_time)
                 except KeyboardInterrupt:
+                    if os.path.exists(part):
+                        os.remove(part)
                     sys.stderr.write("cancelled\n")
                     return False
             else:
@@ -302,15 +523,20 @@ def format_papers(papers, style='detailed', formatted=0):
     ABSTRACT = '37'            # light grey (neutral)
 
     if style == 'json':
-        print(json.dumps(papers, indent=2, ensure_ascii=False))
+        # Indent for terminals; emit compact JSON when piped to tools like jq
+        if sys.stdout.isatty():
+            print(json.dumps(papers, indent=2, ensure_ascii=False))
+        else:
+            print(json.dumps(papers, separators=(',', ':'), ensure_ascii=False))
     elif style == 'compact':
         w = len(str(len(papers)))
-        for i, p in enumerate(papers, 1):
-            idx_num = fmt(str(i).zfill(w), INDEX)
-            date = fmt(p['published'], DATE)
-            title = fmt(p['title'], TITLE_WHITE)
-            print("[%s, %s] %s" % (idx_num, date, title))
+        lines = ["[%s, %s] %s" % (fmt('%0*d' % (w, i), INDEX), fmt(p['published'], DATE), fmt(p['title'], TITLE_WHITE))
+                 for i, p in enumerate(papers, 1)]
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")  # One write for the whole listing
     else:  # detailed
+        blocks = []
+        color_count = lambda m: '(' + fmt(m.group(1), AUTHOR) + ')'  # Built once, not per paper
         for i, p in enumerate(papers, 1):
             idx_num = fmt(str(i), INDEX)
             title = fmt(p['title'], TITLE_BOLD_WHITE)
@@ -322,7 +548,7 @@ def format_papers(papers, style='detailed', formatted=0):
                 author_names = parts[0].split(', ')
                 colored_authors = ', '.join([fmt(a, AUTHOR) for a in author_names])
                 suffix = parts[1]
-                colored_suffix = re.sub(r'\((\d+)\)', lambda m: '(' + fmt(m.group(1), AUTHOR) + ')', suffix)
+                colored_suffix = AUTHOR_COUNT_PATTERN.sub(color_count, suffix)
                 colored_authors += ' et al.' + colored_suffix
             else:
                 author_parts = author_str.split(', ')
@@ -332,74 +558,92 @@ def format_papers(papers, style='detailed', formatted=0):
             link = fmt(p['link'], LINK)
             abstract = fmt(p['abstract'], ABSTRACT)
 
-            print("\n[%s] %s" % (idx_num, title))
-            print("    %s\n    %s | %s\n    %s" % (colored_authors, date, link, abstract))
+            blocks.append("\n[%s] %s\n    %s\n    %s | %s\n    %s\n" %
+                          (idx_num, title, colored_authors, date, link, abstract))
+        if blocks:
+            sys.stdout.write("".join(blocks))  # One write for the whole listing
 
 def parse_indices(spec, total):
     """Parse index specification like '1,3-5,8' into 0-based indices list."""
     if not spec:
         return None
-    indices = set()
+    selected = bytearray(total)  # One flag per paper: dedupes and keeps order without sorting
     try:
         for part in spec.split(','):
-            part = part.strip()
-            if '-' in part:
-                start, end = part.split('-', 1)
-                start_idx, end_idx = int(start) - 1, int(end) - 1
-                if start_idx < 0 or end_idx >= total or start_idx > end_idx:
-                    return None
-                indices.update(range(start_idx, end_idx + 1))
-            else:
-                idx = int(part) - 1
-                if idx < 0 or idx >= total:
-                    return None
-                indices.add(idx)
-        return sorted(indices)
-    except (ValueError, AttributeError):
+            m = INDEX_PART_PATTERN.match(part)
+            if not m:
+                return None
+            start_idx = int(m.group(1)) - 1
+            end_idx = int(m.group(2)) - 1 if m.group(2) else start_idx
+            if start_idx < 0 or end_idx >= total or start_idx > end_idx:
+                return None
+            selected[start_idx:end_idx + 1] = b'\x01' * (end_idx + 1 - start_idx)
+        return [i for i, flag in enumerate(selected) if flag]
+    except AttributeError:
         return None
 
 def download_papers(papers, output_dir, indices=None, formatted=0):
     """Download papers to output_dir, optionally filtering by indices (0-based)"""
     selected_papers = [papers[i] for i in indices] if indices else papers
 
+    # The same paper can appear twice (e.g. across API pages); fetch it once
+    seen, unique = set(), []
+    for p in selected_papers:
+        paper_id = arxiv_id(p['link'])
+        if paper_id not in seen:
+            seen.add(paper_id)
+            unique.append(p)
+    duplicates = len(selected_papers) - len(unique)
+    selected_papers = unique
+
     path_display = output_dir.rstrip('/')
     if formatted:
-        sys.stderr.write("\nDownloading to '\033[94m%s/\033[0m'...\n" % path_display)
+        header = "\nDownloading to '\033[94m%s/\033[0m'...\n" % path_display
     else:
-        sys.stderr.write("\nDownloading to '%s/'...\n" % path_display)
+        header = "\nDownloading to '%s/'...\n" % path_display
     if len(selected_papers) > 1:
-        sys.stderr.write("Rate limiting: %.1fs delay between downloads\n" % DEFAULT_DOWNLOAD_DELAY)
+        header += "Rate limiting: %.1fs delay between downloads\n" % DEFAULT_DOWNLOAD_DELAY
+    if duplicates:
+        header += "Skipping %d duplicate paper%s\n" % (duplicates, '' if duplicates == 1 else 's')
+    sys.stderr.write(header)
 
     ok = 0
+    skipped = 0
     captcha_count = 0
     w = len(str(len(selected_papers)))
 
     for i, p in enumerate(selected_papers, 1):
-        sys.stderr.write("[%s/%s] " % (str(i).zfill(w), str(len(selected_papers)).zfill(w)))
-        sys.stderr.flush()
+        # No flush: the counter goes out together with download()'s flushed "id..." line
+        sys.stderr.write("[%0*d/%0*d] " % (w, i, w, len(selected_papers)))
+        started = _monotonic()
         result = download(p['link'], output_dir, p.get('title', ''), formatted)
 
         if result == 'captcha':
             captcha_count += 1
         elif result:
             ok += 1
+            if result == 'exists':
+                skipped += 1
 
-        if i < len(selected_papers):
+        if i < len(selected_papers) and result != 'exists':  # A skipped paper made no request
+            # Pace start-to-start: time spent downloading counts toward the delay
             try:
-                time.sleep(DEFAULT_DOWNLOAD_DELAY)
+                time.sleep(max(0.0, DEFAULT_DOWNLOAD_DELAY - (_monotonic() - started)))
             except KeyboardInterrupt:
                 msg = "\n\nDownload cancelled by user.\n%d/%d saved before cancellation\n" % (ok, len(selected_papers))
                 sys.stderr.write(format_warning(msg, formatted) if formatted else msg)
                 sys.exit(EXIT_SIGINT)
 
-    sys.stderr.write("\n%d/%d saved" % (ok, len(selected_papers)))
+    summary = "\n%d/%d saved" % (ok, len(selected_papers))
+    if skipped:
+        summary += ", %d already present" % skipped
     if captcha_count > 0:
-        sys.stderr.write(", %d CAPTCHA blocked\n\n" % captcha_count)
-        sys.stderr.write("Rate limit triggered. Try:\n")
-        sys.stderr.write("  - Wait a few minutes before retrying\n")
-        sys.stderr.write("  - Reduce downloads: -n <number>\n")
-        sys.stderr.write("  - Increase delay: XIV_DOWNLOAD_DELAY=5.0\n")
-    sys.stderr.write("\n")
+        summary += (", %d CAPTCHA blocked\n\n" % captcha_count +
+                    "Rate limit triggered. Try:\n"
+                    "  - Wait a few minutes before retrying\n"
+                    "  - Reduce downloads: -n <number>\n"
+                    "  - Increase delay: XIV_DOWNLOAD_DELAY=5.0\n")
+    sys.stderr.write(summary + "\n")
 
 def show_config():
     """Display current configuration and exit"""
@@ -411,7 +655,9 @@ def show_config():
         ('XIV_PDF_DIR', DEFAULT_PDF_DIR),
         ('XIV_DOWNLOAD_DELAY', DEFAULT_DOWNLOAD_DELAY),
         ('XIV_RETRY_ATTEMPTS', DEFAULT_RETRY_ATTEMPTS),
-        ('XIV_MAX_AUTHORS', DEFAULT_MAX_AUTHORS)
+        ('XIV_MAX_AUTHORS', DEFAULT_MAX_AUTHORS),
+        ('XIV_CACHE_TTL', DEFAULT_CACHE_TTL),
+        ('XIV_CACHE_DIR', DEFAULT_CACHE_DIR)
     ]
 
     print("Configuration:")
@@ -428,6 +674,7 @@ def show_config():
     print("  XIV_DOWNLOAD_DELAY  0.0-60.0  (< 3.0 violates API limits, risks blocking)")
     print("  XIV_RETRY_ATTEMPTS  1-10")
     print("  XIV_MAX_AUTHORS     1-20")
+    print("  XIV_CACHE_TTL       0-604800  (seconds, 0 disables the query cache)")
     sys.exit(0)
 
 def validate_download_dir(output_dir):
@@ -440,6 +687,16 @@ def validate_download_dir(output_dir):
         return "No write permission for: %s" % parent
     return None
 
+def split_download_args(args):
+    """Split -d arguments into (output_dir, indices_spec); a lone argument is indices if it looks like them"""
+    if len(args) == 1:
+        if INDICES_PATTERN.match(args[0]):
+            return DEFAULT_PDF_DIR, args[0]
+        return args[0], None
+    if len(args) == 2:
+        return args[0], args[1]
+    return DEFAULT_PDF_DIR, None
+
 def parse_download_args(args, num_papers, formatted=0):
     """Parse -d arguments and return (output_dir, indices).
 
@@ -449,16 +706,7 @@ def parse_download_args(args, num_papers, formatted=0):
     if args is None:
         return None, None
 
-    output_dir = DEFAULT_PDF_DIR
-    indices_spec = None
-
-    if len(args) == 1:
-        if re.match(INDICES_PATTERN, args[0]):
-            indices_spec = args[0]
-        else:
-            output_dir = args[0]
-    elif len(args) == 2:
-        output_dir, indices_spec = args[0], args[1]
+    output_dir, indices_spec = split_download_args(args)
 
     indices = None
     if indices_spec:
@@ -495,19 +743,10 @@ def validate_cli_args(args, formatted=0):
             sys.stderr.write(format_error("Error: -d accepts at most 2 arguments (DIR and INDICES)\n", formatted))
             sys.exit(1)
 
-        output_dir = DEFAULT_PDF_DIR
-        indices_spec = None
-
-        if len(args.d) == 1:
-            if re.match(INDICES_PATTERN, args.d[0]):
-                indices_spec = args.d[0]
-            else:
-                output_dir = args.d[0]
-        elif len(args.d) == 2:
-            output_dir, indices_spec = args.d[0], args.d[1]
+        output_dir, indices_spec = split_download_args(args.d)
 
         # Check if user swapped DIR and INDICES
-        if indices_spec and not re.match(INDICES_PATTERN, indices_spec):
+        if indices_spec and not INDICES_PATTERN.match(indices_spec):
             msg = "Error: Expected index specification (e.g., 1,3-5) but got '%s'\n" % indices_spec
             msg += "Did you mean: -d %s %s\n" % (indices_spec, output_dir)
             sys.stderr.write(format_error(msg, formatted))
@@ -531,7 +770,7 @@ def parse_arguments():
                    help='sort by: date, updated, relevance (default: %s, env: XIV_SORT)' % DEFAULT_SORT)
     p.add_argument('-d', nargs='*', metavar='ARG',
                    help='download PDFs; accepts: -d (default dir \'papers\', env: XIV_PDF_DIR), -d DIR, -d 1,3-5, -d DIR 1,3-5')
-    p.add_argument('-j', action='store_true', help='output as JSON')
+    p.add_argument('-j', action='store_true', help='output as JSON (indented in a terminal, compact when piped)')
     p.add_argument('-l', action='store_true', help='compact list output')
     p.add_argument('-f', action='store_true', help='formatted output with color (default: %d, env: XIV_FORMAT)' % DEFAULT_FORMAT)
     p.add_argument('-e', '--env', action='store_true', help='show environment configuration and exit')